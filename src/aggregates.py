@@ -0,0 +1,340 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from src.contingency import proportion_tests
+from src.datasets import DEFAULT_CSV_CHUNKSIZE
+
+
+# Compact dtypes for the cookie_cats.csv schema.
+COOKIE_CATS_DTYPES = {
+    "userid": "int32",
+    "version": "category",
+    "sum_gamerounds": "int32",
+    "retention_1": "bool",
+    "retention_7": "bool",
+}
+
+
+class ArmStats:
+    """
+    Mergeable per-arm sufficient statistics (count, mean, sum of squared deviations).
+
+    Statistics for every arm and metric sit in (arms x metrics) NumPy arrays.
+    ``update`` folds in a chunk of rows with Welford/Chan updates and ``merge``
+    combines accumulators built from different files, processes or days, so
+    test statistics can be computed without keeping raw rows. Missing metric
+    values are skipped.
+    """
+
+    def __init__(self, metrics: list, arm_col: str = None) -> None:
+        """
+        Create an empty accumulator.
+
+        Parameters:
+            metrics (list): Names of the metric columns.
+            arm_col (str, optional): Column holding the arm label when updating from a
+                DataFrame, e.g. 'version'. Defaults to None.
+        """
+
+        self.metrics = list(metrics)
+        self.arm_col = arm_col
+        self.arms = []
+        self.count = np.zeros((0, len(self.metrics)), dtype=np.int64)
+        self.mean = np.zeros((0, len(self.metrics)))
+        self.m2 = np.zeros((0, len(self.metrics)))
+
+    def _arm_positions(self, labels) -> np.ndarray:
+        """
+        Map arm labels to row positions, adding rows for arms not seen before.
+
+        Parameters:
+            labels (array-like): Arm labels.
+
+        Returns:
+            np.ndarray: Row position of every label.
+        """
+
+        positions = {arm: i for i, arm in enumerate(self.arms)}
+        new_arms = [label for label in labels if label not in positions]
+        if new_arms:
+            self.arms.extend(new_arms)
+            positions.update({arm: i for i, arm in enumerate(self.arms)})
+            padding = ((0, len(new_arms)), (0, 0))
+            self.count = np.pad(self.count, padding)
+            self.mean = np.pad(self.mean, padding)
+            self.m2 = np.pad(self.m2, padding)
+        return np.array([positions[label] for label in labels], dtype=np.int64)
+
+    def _combine(
+        self, rows: np.ndarray, count: np.ndarray, mean: np.ndarray, m2: np.ndarray
+    ) -> None:
+        """
+        Merge partial statistics into the given arm rows with Chan's parallel update.
+
+        Parameters:
+            rows (np.ndarray): Row positions of the arms being merged.
+            count (np.ndarray): Partial counts, one row per arm.
+            mean (np.ndarray): Partial means, one row per arm.
+            m2 (np.ndarray): Partial sums of squared deviations, one row per arm.
+
+        Returns:
+            None
+        """
+
+        count_a = self.count[rows]
+        total = count_a + count
+        delta = mean - self.mean[rows]
+        share = np.divide(count, total, out=np.zeros(total.shape), where=total > 0)
+
+        self.mean[rows] += delta * share
+        self.m2[rows] += m2 + delta**2 * count_a * share
+        self.count[rows] = total
+
+    def update(self, chunk, arms=None) -> "ArmStats":
+        """
+        Fold a chunk of rows into the statistics.
+
+        Parameters:
+            chunk (pd.DataFrame or array-like): Rows to add; a DataFrame must contain the
+                metric columns, an array has one column per metric.
+            arms (array-like, optional): Arm label of every row. Defaults to the ``arm_col``
+                column of ``chunk``.
+
+        Returns:
+            ArmStats: The updated accumulator, for chaining.
+        """
+
+        if arms is None:
+            if self.arm_col is None:
+                raise ValueError("Pass arms or set arm_col to update from a DataFrame.")
+            arms = chunk[self.arm_col]
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.metrics]
+        values = np.asarray(chunk, dtype=float).reshape(-1, len(self.metrics))
+
+        codes, labels = pd.factorize(np.asarray(arms))
+        if (codes < 0).any():
+            raise ValueError("Arm labels must not contain missing values.")
+        n_arms, n_metrics = len(labels), len(self.metrics)
+
+        present = ~np.isnan(values)
+        cells = (codes[:, None] * n_metrics + np.arange(n_metrics)).ravel()
+        size = n_arms * n_metrics
+
+        count = np.bincount(cells, weights=present.ravel(), minlength=size)
+        sums = np.bincount(cells, weights=np.where(present, values, 0).ravel(), minlength=size)
+        mean = np.divide(sums, count, out=np.zeros(size), where=count > 0)
+        deviations = np.where(present, values - mean[cells].reshape(values.shape), 0)
+        m2 = np.bincount(cells, weights=(deviations**2).ravel(), minlength=size)
+
+        self._combine(
+            self._arm_positions(labels),
+            count.reshape(n_arms, n_metrics).astype(np.int64),
+            mean.reshape(n_arms, n_metrics),
+            m2.reshape(n_arms, n_metrics),
+        )
+        return self
+
+    def merge(self, other: "ArmStats") -> "ArmStats":
+        """
+        Combine two accumulators into a new one; the operation is associative.
+
+        Parameters:
+            other (ArmStats): Statistics over other rows of the same metrics.
+
+        Returns:
+            ArmStats: Statistics over the rows of both accumulators.
+        """
+
+        if other.metrics != self.metrics:
+            raise ValueError("Cannot merge statistics of different metrics.")
+
+        merged = ArmStats(self.metrics, self.arm_col)
+        for source in (self, other):
+            merged._combine(
+                merged._arm_positions(source.arms), source.count, source.mean, source.m2
+            )
+        return merged
+
+    def _row(self, arm) -> int:
+        """
+        Row position of an arm label.
+
+        Parameters:
+            arm: The arm label.
+
+        Returns:
+            int: Row position of the arm.
+        """
+
+        if arm not in self.arms:
+            raise KeyError(f"Unknown arm: {arm!r}")
+        return self.arms.index(arm)
+
+    @property
+    def sum(self) -> np.ndarray:
+        """Per-arm, per-metric sum of the observations."""
+
+        return self.mean * self.count
+
+    @property
+    def sum_of_squares(self) -> np.ndarray:
+        """Per-arm, per-metric sum of squared observations."""
+
+        return self.m2 + self.count * self.mean**2
+
+    def variance(self, ddof: int = 1) -> np.ndarray:
+        """
+        Per-arm, per-metric variance.
+
+        Parameters:
+            ddof (int, optional): Delta degrees of freedom. Defaults to 1.
+
+        Returns:
+            np.ndarray: Variances, NaN where there are not enough observations.
+        """
+
+        dof = self.count - ddof
+        return np.divide(self.m2, dof, out=np.full(self.m2.shape, np.nan), where=dof > 0)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Summarize the statistics as a DataFrame.
+
+        Returns:
+            pd.DataFrame: Count, mean and standard deviation for every arm (rows) and metric.
+        """
+
+        return pd.concat(
+            {
+                "count": pd.DataFrame(self.count, index=self.arms, columns=self.metrics),
+                "mean": pd.DataFrame(self.mean, index=self.arms, columns=self.metrics),
+                "std": pd.DataFrame(
+                    np.sqrt(self.variance()), index=self.arms, columns=self.metrics
+                ),
+            },
+            axis=1,
+        ).swaplevel(axis=1)[self.metrics]
+
+    def ttest_ind(self, arm_a, arm_b, metric: str, equal_var: bool = True) -> tuple:
+        """
+        Two-sample t-test (or Welch's test) between two arms from the aggregates.
+
+        Parameters:
+            arm_a: Label of the first arm.
+            arm_b: Label of the second arm.
+            metric (str): The metric to compare.
+            equal_var (bool, optional): Assume equal variances; False runs Welch's test.
+                Defaults to True.
+
+        Returns:
+            tuple: (t statistic, p-value).
+        """
+
+        a, b, j = self._row(arm_a), self._row(arm_b), self.metrics.index(metric)
+        std = np.sqrt(self.variance())
+        result = stats.ttest_ind_from_stats(
+            self.mean[a, j], std[a, j], self.count[a, j],
+            self.mean[b, j], std[b, j], self.count[b, j],
+            equal_var=equal_var,
+        )
+        return result.statistic, result.pvalue
+
+    def f_oneway(self, metric: str) -> tuple:
+        """
+        One-way ANOVA across all arms from the aggregates.
+
+        Parameters:
+            metric (str): The metric to compare.
+
+        Returns:
+            tuple: (F statistic, p-value).
+        """
+
+        j = self.metrics.index(metric)
+        count, mean, m2 = self.count[:, j], self.mean[:, j], self.m2[:, j]
+        n_obs, n_arms = count.sum(), len(count)
+        grand_mean = np.sum(count * mean) / n_obs
+
+        ss_between = np.sum(count * (mean - grand_mean) ** 2)
+        ss_within = np.sum(m2)
+        f_stat = (ss_between / (n_arms - 1)) / (ss_within / (n_obs - n_arms))
+        return f_stat, stats.f.sf(f_stat, n_arms - 1, n_obs - n_arms)
+
+    def proportion_tests(self, arm_a, arm_b, metric: str) -> pd.DataFrame:
+        """
+        Chi-square, Fisher exact and z-tests between two arms for a 0/1 metric.
+
+        Parameters:
+            arm_a: Label of the first arm.
+            arm_b: Label of the second arm.
+            metric (str): A boolean or 0/1 metric such as 'retention_1'.
+
+        Returns:
+            pd.DataFrame: The results of ``src.contingency.proportion_tests``.
+        """
+
+        a, b, j = self._row(arm_a), self._row(arm_b), self.metrics.index(metric)
+        successes = np.rint(self.sum[:, j]).astype(np.int64)
+        return proportion_tests(
+            successes[a], self.count[a, j], successes[b], self.count[b, j]
+        )
+
+
+def aggregate_csv(
+    file_path: str,
+    arm_col: str = "version",
+    metrics: list = None,
+    histogram_cols: list = None,
+    dtype: dict = None,
+    chunksize: int = DEFAULT_CSV_CHUNKSIZE,
+) -> tuple:
+    """
+    Stream a CSV file in chunks and fold it into per-arm statistics and histograms.
+
+    Each chunk is read with compact dtypes, reduced into an ``ArmStats`` and
+    per-arm value counts, and then dropped, so memory stays constant no matter
+    how many rows the file has.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        arm_col (str, optional): Column holding the arm label. Defaults to 'version'.
+        metrics (list, optional): Metric columns to aggregate.
+            Defaults to ['sum_gamerounds', 'retention_1', 'retention_7'].
+        histogram_cols (list, optional): Discrete columns to count per value and arm.
+            Defaults to ['sum_gamerounds'].
+        dtype (dict, optional): Column dtypes passed to pd.read_csv. Defaults to COOKIE_CATS_DTYPES.
+        chunksize (int, optional): Number of rows read at a time. Defaults to 1,000,000.
+
+    Returns:
+        tuple: (ArmStats over the metrics, dict mapping every histogram column to a
+            DataFrame of counts with one row per value and one column per arm).
+    """
+
+    if metrics is None:
+        metrics = ["sum_gamerounds", "retention_1", "retention_7"]
+    if histogram_cols is None:
+        histogram_cols = ["sum_gamerounds"]
+    if dtype is None:
+        dtype = COOKIE_CATS_DTYPES
+
+    usecols = list(dict.fromkeys([arm_col, *metrics, *histogram_cols]))
+    dtype = {col: col_dtype for col, col_dtype in dtype.items() if col in usecols}
+
+    arm_stats = ArmStats(metrics, arm_col)
+    value_counts = {col: None for col in histogram_cols}
+
+    for chunk in pd.read_csv(file_path, usecols=usecols, dtype=dtype, chunksize=chunksize):
+        arm_stats.update(chunk)
+        for col in histogram_cols:
+            counts = chunk.groupby([arm_col, col], observed=True).size()
+            if value_counts[col] is not None:
+                counts = value_counts[col].add(counts, fill_value=0)
+            value_counts[col] = counts
+
+    histograms = {
+        col: counts.unstack(arm_col, fill_value=0).astype(np.int64).sort_index()
+        for col, counts in value_counts.items()
+    }
+    return arm_stats, histograms
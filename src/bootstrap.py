@@ -0,0 +1,1023 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from src.datasets import DEFAULT_CSV_CHUNKSIZE
+from src.parallel import (
+    DEFAULT_MAX_MEMORY_BYTES,
+    WorkerPool,
+    parallel_map,
+    resolve_workers,
+    spawn_generators,
+    split_count,
+)
+
+
+# Each resampled element costs one int64 index plus one float64 value.
+_BYTES_PER_RESAMPLED_ELEMENT = 16
+
+# 'auto' switches to the histogram method once a sample has at least this
+# many observations per distinct value.
+_HISTOGRAM_MIN_COMPRESSION = 10
+
+
+def _as_array(data) -> np.ndarray:
+    """
+    Convert a Series, list or array into a one-dimensional NumPy array without copying when possible.
+
+    Parameters:
+        data (array-like): The input observations.
+
+    Returns:
+        np.ndarray: A one-dimensional view of the observations.
+    """
+
+    if isinstance(data, pd.Series):
+        data = data.to_numpy()
+    data = np.asarray(data)
+    if data.ndim != 1:
+        raise ValueError("Bootstrap input must be one-dimensional.")
+    if data.size == 0:
+        raise ValueError("Bootstrap input must contain at least one observation.")
+    return data
+
+
+def _chunk_shape(n_obs: int, num_resamples: int, max_memory_bytes: int) -> tuple:
+    """
+    Choose how many resamples and observations to draw at once under a memory budget.
+
+    Parameters:
+        n_obs (int): Number of observations in the sample.
+        num_resamples (int): Total number of resamples requested.
+        max_memory_bytes (int): Memory budget for a single chunk of draws.
+
+    Returns:
+        tuple: (resamples per chunk, observations per chunk).
+    """
+
+    elements = max(1, max_memory_bytes // _BYTES_PER_RESAMPLED_ELEMENT)
+    if n_obs <= elements:
+        return max(1, min(num_resamples, elements // n_obs)), n_obs
+    return 1, elements
+
+
+def _chunked_resample_means(
+    data: np.ndarray,
+    num_resamples: int,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> np.ndarray:
+    """
+    Draw bootstrap resample means in fixed-size chunks so peak memory is bounded.
+
+    Parameters:
+        data (np.ndarray): The observations to resample.
+        num_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws.
+
+    Returns:
+        np.ndarray: The mean of every resample.
+    """
+
+    n_obs = len(data)
+    rows, cols = _chunk_shape(n_obs, num_resamples, max_memory_bytes)
+    resample_means = np.empty(num_resamples)
+
+    for start in range(0, num_resamples, rows):
+        stop = min(start + rows, num_resamples)
+        sums = np.zeros(stop - start)
+        for col_start in range(0, n_obs, cols):
+            size = min(cols, n_obs - col_start)
+            idx = rng.integers(0, n_obs, size=(stop - start, size))
+            sums += data[idx].sum(axis=1)
+        resample_means[start:stop] = sums / n_obs
+
+    return resample_means
+
+
+def _is_binary(data: np.ndarray) -> bool:
+    """
+    Check whether a sample only contains boolean or 0/1 values.
+
+    Parameters:
+        data (np.ndarray): The observations to check.
+
+    Returns:
+        bool: True if every observation is 0 or 1.
+    """
+
+    if data.dtype == bool:
+        return True
+    if not np.issubdtype(data.dtype, np.number):
+        return False
+    return bool(np.all((data == 0) | (data == 1)))
+
+
+def _binomial_resample_means(
+    n_obs: int, successes: int, num_resamples: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Draw bootstrap resample means of a binary sample as binomial success counts.
+
+    The mean of a resample of 0/1 values depends only on its number of
+    successes, which follows Binomial(n, p_hat).
+
+    Parameters:
+        n_obs (int): Number of observations in the sample.
+        successes (int): Number of 1/True observations in the sample.
+        num_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: The mean of every resample.
+    """
+
+    return rng.binomial(n_obs, successes / n_obs, size=num_resamples) / n_obs
+
+
+def _histogram_resample_means(
+    values: np.ndarray,
+    counts: np.ndarray,
+    num_resamples: int,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> np.ndarray:
+    """
+    Draw bootstrap resample means from a sample compressed to (value, count) pairs.
+
+    Each resample is a multinomial draw of counts over the distinct values, so
+    the cost scales with the number of distinct values rather than observations.
+
+    Parameters:
+        values (np.ndarray): Distinct values of the sample.
+        counts (np.ndarray): Number of observations for each distinct value.
+        num_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws.
+
+    Returns:
+        np.ndarray: The mean of every resample.
+    """
+
+    n_obs = int(counts.sum())
+    probabilities = counts / n_obs
+    values = values.astype(float, copy=False)
+    rows = max(1, min(num_resamples, max_memory_bytes // (8 * len(values))))
+    resample_means = np.empty(num_resamples)
+
+    for start in range(0, num_resamples, rows):
+        stop = min(start + rows, num_resamples)
+        resample_counts = rng.multinomial(n_obs, probabilities, size=stop - start)
+        resample_means[start:stop] = resample_counts @ values / n_obs
+
+    return resample_means
+
+
+def _integer_histogram(data: np.ndarray, max_range: int) -> tuple:
+    """
+    Count the distinct values of an integer sample with ``np.bincount``.
+
+    Parameters:
+        data (np.ndarray): Integer observations.
+        max_range (int): Largest value range (max - min + 1) to count.
+
+    Returns:
+        tuple: (distinct values, counts), or None if the value range is wider than
+            ``max_range`` or the dtype cannot be counted with ``np.bincount`` (uint64).
+    """
+
+    if data.dtype == np.uint64:
+        return None
+    low, high = int(data.min()), int(data.max())
+    if high - low + 1 > max_range:
+        return None
+    # Shift in int64: narrow dtypes such as compacted int8 columns would overflow.
+    shifted = np.subtract(data, low, dtype=np.int64) if low else data
+    counts = np.bincount(shifted, minlength=high - low + 1)
+    values = np.flatnonzero(counts)
+    return values + low, counts[values]
+
+
+def _prepare_sample(data: np.ndarray, method: str = "auto") -> tuple:
+    """
+    Resolve the resampling method for a sample and reduce it to what that method needs.
+
+    Parameters:
+        data (np.ndarray): The observations to resample.
+        method (str, optional): 'auto', 'rows', 'binomial' or 'histogram'. Defaults to 'auto'.
+
+    Returns:
+        tuple: (resolved method, tuple of arguments for the method's sampler).
+    """
+
+    if method == "auto":
+        if _is_binary(data):
+            method = "binomial"
+        elif np.issubdtype(data.dtype, np.integer):
+            # Only integer samples are counted; continuous floats rarely compress
+            # and would need a full sort just to decide against the histogram.
+            # Heavy-tailed counts have a wide range but few distinct values, so
+            # a range too wide for np.bincount falls back to np.unique.
+            histogram = _integer_histogram(data, len(data))
+            if histogram is None:
+                histogram = tuple(np.unique(data, return_counts=True))
+            if len(histogram[0]) * _HISTOGRAM_MIN_COMPRESSION <= len(data):
+                return "histogram", histogram
+            method = "rows"
+        else:
+            method = "rows"
+
+    if method == "binomial":
+        if not _is_binary(data):
+            raise ValueError("The 'binomial' method requires boolean or 0/1 data.")
+        return method, (len(data), int(np.count_nonzero(data)))
+    if method == "histogram":
+        histogram = None
+        if np.issubdtype(data.dtype, np.integer):
+            histogram = _integer_histogram(data, len(data))
+        if histogram is None:
+            histogram = tuple(np.unique(data, return_counts=True))
+        return method, histogram
+    if method == "rows":
+        return method, (data.astype(float, copy=False),)
+    raise ValueError(f"Unknown bootstrap method: {method!r}")
+
+
+def _draw_resample_means(
+    method: str,
+    sample: tuple,
+    num_resamples: int,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> np.ndarray:
+    """
+    Draw bootstrap resample means for a sample prepared by ``_prepare_sample``.
+
+    Parameters:
+        method (str): Resolved resampling method.
+        sample (tuple): Arguments for the method's sampler.
+        num_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws.
+
+    Returns:
+        np.ndarray: The mean of every resample.
+    """
+
+    if method == "binomial":
+        return _binomial_resample_means(*sample, num_resamples, rng)
+    if method == "histogram":
+        return _histogram_resample_means(*sample, num_resamples, rng, max_memory_bytes)
+    return _chunked_resample_means(*sample, num_resamples, rng, max_memory_bytes)
+
+
+def _resample_means(
+    method: str,
+    sample: tuple,
+    num_resamples: int,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    workers: int = 1,
+    pool: WorkerPool = None,
+) -> np.ndarray:
+    """
+    Draw bootstrap resample means for a prepared sample, optionally across worker processes.
+
+    With more than one worker the resamples are split into one batch per
+    worker, each drawn from its own child stream of ``rng``, so results are
+    reproducible for a given seed and worker count.
+
+    Parameters:
+        method (str): Resolved resampling method from ``_prepare_sample``.
+        sample (tuple): Arguments for the method's sampler from ``_prepare_sample``.
+        num_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        pool (WorkerPool, optional): Pool reused across calls, so repeated batches do not
+            restart processes or re-share the sample. Defaults to None.
+
+    Returns:
+        np.ndarray: The mean of every resample.
+    """
+
+    # Never start more workers than there are resamples, so no batch is empty.
+    workers = min(resolve_workers(workers), max(1, num_resamples))
+    if workers == 1:
+        return _draw_resample_means(method, sample, num_resamples, rng, max_memory_bytes)
+
+    tasks = [
+        (method, sample, batch, batch_rng, max_memory_bytes // workers)
+        for batch, batch_rng in zip(
+            split_count(num_resamples, workers), spawn_generators(rng, workers)
+        )
+    ]
+    return np.concatenate(parallel_map(_draw_resample_means, tasks, workers, pool))
+
+
+def _percentile_standard_error(sorted_stats: np.ndarray, quantile: float) -> float:
+    """
+    Estimate the Monte-Carlo standard error of a bootstrap percentile.
+
+    The number of resamples below the true quantile is Binomial(B, q), so the
+    order statistics one binomial standard deviation either side of B * q
+    span roughly two standard errors of the percentile.
+
+    Parameters:
+        sorted_stats (np.ndarray): Sorted bootstrap distribution of the statistic.
+        quantile (float): The percentile as a fraction between 0 and 1.
+
+    Returns:
+        float: Estimated standard error of the percentile.
+    """
+
+    num_resamples = len(sorted_stats)
+    spread = np.sqrt(num_resamples * quantile * (1 - quantile))
+    lower = int(np.clip(np.floor(num_resamples * quantile - spread), 0, num_resamples - 1))
+    upper = int(np.clip(np.ceil(num_resamples * quantile + spread), 0, num_resamples - 1))
+    return (sorted_stats[upper] - sorted_stats[lower]) / 2
+
+
+def _draw_until_converged(
+    draw,
+    num_resamples: int,
+    confidence_level: float = 0.95,
+    tolerance: float = None,
+    batch_size: int = 1000,
+) -> np.ndarray:
+    """
+    Draw bootstrap statistics in batches until the CI bounds are precise enough.
+
+    Parameters:
+        draw (callable): Function returning a given number of bootstrap statistics.
+        num_resamples (int): Maximum number of resamples; all are drawn when tolerance is None.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        tolerance (float, optional): Target Monte-Carlo standard error of both bounds. Defaults to None.
+        batch_size (int, optional): Number of resamples drawn between convergence checks. Defaults to 1000.
+
+    Returns:
+        np.ndarray: The bootstrap statistics drawn.
+    """
+
+    if tolerance is None:
+        return draw(num_resamples)
+
+    quantiles = ((1 - confidence_level) / 2, (1 + confidence_level) / 2)
+    batches = []
+    drawn = 0
+    while drawn < num_resamples:
+        batch = draw(min(batch_size, num_resamples - drawn))
+        batches.append(batch)
+        drawn += len(batch)
+
+        sorted_stats = np.sort(np.concatenate(batches))
+        errors = [_percentile_standard_error(sorted_stats, q) for q in quantiles]
+        if max(errors) < tolerance:
+            break
+
+    return np.concatenate(batches)
+
+
+def _percentile_ci(resample_stats: np.ndarray, confidence_level: float = 0.95) -> tuple:
+    """
+    Compute a percentile confidence interval from bootstrap statistics.
+
+    Parameters:
+        resample_stats (np.ndarray): Bootstrap distribution of the statistic, one column
+            per statistic when two-dimensional.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+
+    Returns:
+        tuple: (lower, upper) bounds of the interval.
+    """
+
+    lower = np.percentile(resample_stats, (1 - confidence_level) / 2 * 100, axis=0)
+    upper = np.percentile(resample_stats, (1 + confidence_level) / 2 * 100, axis=0)
+    return lower, upper
+
+
+def _jackknife_means(data: np.ndarray) -> np.ndarray:
+    """
+    Compute every leave-one-out mean of a sample in O(n).
+
+    Each leave-one-out mean follows from the sample total, so no per-row
+    mean is ever recomputed.
+
+    Parameters:
+        data (np.ndarray): The observations.
+
+    Returns:
+        np.ndarray: The mean of the sample with each observation left out in turn.
+    """
+
+    n_obs = len(data)
+    if n_obs < 2:
+        raise ValueError("BCa intervals need at least two observations per sample.")
+    data = data.astype(float, copy=False)
+    return (data.sum() - data) / (n_obs - 1)
+
+
+def _bca_ci(
+    resample_stats: np.ndarray,
+    estimate: float,
+    jackknife_stats: np.ndarray,
+    confidence_level: float = 0.95,
+) -> tuple:
+    """
+    Compute a bias-corrected and accelerated (BCa) confidence interval.
+
+    Parameters:
+        resample_stats (np.ndarray): Bootstrap distribution of the statistic.
+        estimate (float): The statistic on the original sample.
+        jackknife_stats (np.ndarray): Leave-one-out values of the statistic.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+
+    Returns:
+        tuple: (lower, upper) bounds of the interval, NaN when the bias correction is
+            undefined because every resample lies on one side of the estimate.
+    """
+
+    # Ties with the estimate count as half, as in scipy.stats.bootstrap; discrete
+    # (binomial and histogram) resamples often equal the estimate exactly.
+    below = (np.mean(resample_stats < estimate) + np.mean(resample_stats <= estimate)) / 2
+    bias = stats.norm.ppf(below)
+
+    deviations = jackknife_stats.mean() - jackknife_stats
+    squares = np.sum(deviations**2)
+    acceleration = np.sum(deviations**3) / (6 * squares**1.5) if squares > 0 else 0.0
+
+    z = stats.norm.ppf([(1 - confidence_level) / 2, (1 + confidence_level) / 2])
+    with np.errstate(invalid="ignore"):
+        levels = stats.norm.cdf(bias + (bias + z) / (1 - acceleration * (bias + z)))
+    if not np.all(np.isfinite(levels)):
+        return np.nan, np.nan
+    lower, upper = np.percentile(resample_stats, levels * 100)
+    return lower, upper
+
+
+def bootstrap_mean_ci(
+    data,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+    method: str = "auto",
+    workers: int = 1,
+    ci_method: str = "percentile",
+    tolerance: float = None,
+    batch_size: int = 1000,
+) -> tuple:
+    """
+    Bootstrap the mean of a sample and compute a percentile or BCa confidence interval.
+
+    Resamples are drawn in chunks sized to fit ``max_memory_bytes``, so memory
+    stays flat regardless of the number of observations. Boolean or 0/1 data
+    is resampled as binomial success counts, which costs O(num_resamples), and
+    samples with many repeated values are resampled as multinomial counts over
+    their distinct values. With a ``tolerance`` resampling stops early once the
+    Monte-Carlo standard error of both bounds falls below it.
+
+    Parameters:
+        data (array-like): The observations to resample.
+        num_resamples (int, optional): Number of bootstrap resamples. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+        method (str, optional): 'rows' resamples observations, 'binomial' draws success counts
+            for binary data, 'histogram' draws multinomial counts over distinct values,
+            'auto' picks the cheapest applicable method. Defaults to 'auto'.
+        workers (int, optional): Number of worker processes, -1 for all cores. Defaults to 1.
+        ci_method (str, optional): 'percentile' or 'bca' for a bias-corrected and accelerated
+            interval. Defaults to 'percentile'.
+        tolerance (float, optional): Stop once the standard error of both bounds is below this
+            value; ``num_resamples`` becomes the maximum. Defaults to None.
+        batch_size (int, optional): Resamples drawn between convergence checks. Defaults to 1000.
+
+    Returns:
+        tuple: (resample means as np.ndarray, (lower, upper) confidence bounds).
+    """
+
+    data = _as_array(data)
+    rng = np.random.default_rng(rng)
+    method, sample = _prepare_sample(data, method)
+
+    # One pool serves every batch, so adaptive stopping pays for process
+    # start-up and sharing the sample only once.
+    with WorkerPool(workers) as pool:
+
+        def draw(size):
+            return _resample_means(
+                method, sample, size, rng, max_memory_bytes, workers, pool
+            )
+
+        resample_means = _draw_until_converged(
+            draw, num_resamples, confidence_level, tolerance, batch_size
+        )
+    if ci_method == "percentile":
+        return resample_means, _percentile_ci(resample_means, confidence_level)
+    if ci_method == "bca":
+        jackknife_means = _jackknife_means(data)
+        ci = _bca_ci(resample_means, data.mean(), jackknife_means, confidence_level)
+        return resample_means, ci
+    raise ValueError(f"Unknown confidence interval method: {ci_method!r}")
+
+
+def bootstrap_diff_ci(
+    a,
+    b,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+    method: str = "auto",
+    workers: int = 1,
+    ci_method: str = "percentile",
+    tolerance: float = None,
+    batch_size: int = 1000,
+) -> tuple:
+    """
+    Bootstrap the difference of means between two independent samples.
+
+    Both samples are resampled independently with the same method selection
+    as ``bootstrap_mean_ci``, so low-cardinality metrics are resampled in the
+    space of their distinct values.
+
+    Parameters:
+        a (array-like): Observations of the first group.
+        b (array-like): Observations of the second group.
+        num_resamples (int, optional): Number of bootstrap resamples. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+        method (str, optional): Resampling method, see ``bootstrap_mean_ci``. Defaults to 'auto'.
+        workers (int, optional): Number of worker processes, -1 for all cores. Defaults to 1.
+        ci_method (str, optional): 'percentile' or 'bca' for a bias-corrected and accelerated
+            interval. Defaults to 'percentile'.
+        tolerance (float, optional): Stop once the standard error of both bounds is below this
+            value; ``num_resamples`` becomes the maximum. Defaults to None.
+        batch_size (int, optional): Resamples drawn between convergence checks. Defaults to 1000.
+
+    Returns:
+        tuple: (mean differences a - b as np.ndarray, (lower, upper) confidence bounds).
+    """
+
+    a = _as_array(a)
+    b = _as_array(b)
+    rng = np.random.default_rng(rng)
+    method_a, sample_a = _prepare_sample(a, method)
+    method_b, sample_b = _prepare_sample(b, method)
+
+    with WorkerPool(workers) as pool:
+
+        def draw(size):
+            means_a = _resample_means(
+                method_a, sample_a, size, rng, max_memory_bytes, workers, pool
+            )
+            means_b = _resample_means(
+                method_b, sample_b, size, rng, max_memory_bytes, workers, pool
+            )
+            return means_a - means_b
+
+        means_diff = _draw_until_converged(
+            draw, num_resamples, confidence_level, tolerance, batch_size
+        )
+    if ci_method == "percentile":
+        return means_diff, _percentile_ci(means_diff, confidence_level)
+    if ci_method == "bca":
+        mean_a, mean_b = a.mean(), b.mean()
+        jackknife_diffs = np.concatenate(
+            [_jackknife_means(a) - mean_b, mean_a - _jackknife_means(b)]
+        )
+        ci = _bca_ci(means_diff, mean_a - mean_b, jackknife_diffs, confidence_level)
+        return means_diff, ci
+    raise ValueError(f"Unknown confidence interval method: {ci_method!r}")
+
+
+def _group_index(labels) -> tuple:
+    """
+    Build a CSR-style index that makes the rows of every group contiguous.
+
+    Parameters:
+        labels (array-like): Group label of every row, e.g. LocationID or MarketSize.
+
+    Returns:
+        tuple: (row order that makes each group contiguous, group start offsets
+            with a final end offset).
+    """
+
+    codes, uniques = pd.factorize(np.asarray(labels))
+    if (codes < 0).any():
+        raise ValueError("Group labels must not contain missing values.")
+    order = np.argsort(codes, kind="stable")
+    offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(uniques)), out=offsets[1:])
+    return order, offsets
+
+
+def cluster_bootstrap_mean_ci(
+    data,
+    clusters,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+) -> tuple:
+    """
+    Bootstrap the mean of repeated measurements by resampling whole clusters.
+
+    Rows are grouped once through a CSR-style index and every cluster is
+    reduced to its sum and size over its contiguous slice. Each replicate then
+    draws clusters with replacement and takes the ratio of the resampled sums
+    to the resampled sizes, so the per-replicate cost scales with the number
+    of clusters, not rows.
+
+    Parameters:
+        data (array-like): The observations, e.g. weekly SalesInThousands.
+        clusters (array-like): Cluster label of every observation, e.g. LocationID.
+        num_resamples (int, optional): Number of bootstrap resamples. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+
+    Returns:
+        tuple: (resample means as np.ndarray, (lower, upper) confidence bounds).
+    """
+
+    data = _as_array(data).astype(float, copy=False)
+    if len(clusters) != len(data):
+        raise ValueError("data and clusters must have the same length.")
+    rng = np.random.default_rng(rng)
+
+    order, offsets = _group_index(clusters)
+    cluster_sums = np.add.reduceat(data[order], offsets[:-1])
+    cluster_sizes = np.diff(offsets).astype(float)
+
+    n_clusters = len(cluster_sums)
+    probabilities = np.full(n_clusters, 1 / n_clusters)
+    rows = min(num_resamples, max(1, max_memory_bytes // (8 * n_clusters)))
+    resample_means = np.empty(num_resamples)
+
+    for start in range(0, num_resamples, rows):
+        stop = min(start + rows, num_resamples)
+        draws = rng.multinomial(n_clusters, probabilities, size=stop - start)
+        resample_means[start:stop] = (draws @ cluster_sums) / (draws @ cluster_sizes)
+
+    return resample_means, _percentile_ci(resample_means, confidence_level)
+
+
+def _stratified_resample_means(
+    data,
+    strata,
+    num_resamples: int,
+    rng: np.random.Generator,
+    method: str = "auto",
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> np.ndarray:
+    """
+    Draw bootstrap resample means that keep every stratum at its original size.
+
+    Parameters:
+        data (array-like): The observations to resample.
+        strata (array-like): Stratum label of every observation.
+        num_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+        method (str, optional): Resampling method, see ``bootstrap_mean_ci``. Defaults to 'auto'.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws.
+
+    Returns:
+        np.ndarray: The overall mean of every resample.
+    """
+
+    data = _as_array(data)
+    if len(strata) != len(data):
+        raise ValueError("data and strata must have the same length.")
+
+    order, offsets = _group_index(strata)
+    data = data[order]
+    totals = np.zeros(num_resamples)
+
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        stratum_method, sample = _prepare_sample(data[start:stop], method)
+        stratum_means = _resample_means(
+            stratum_method, sample, num_resamples, rng, max_memory_bytes
+        )
+        totals += (stop - start) * stratum_means
+
+    return totals / len(data)
+
+
+def stratified_bootstrap_mean_ci(
+    data,
+    strata,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+    method: str = "auto",
+) -> tuple:
+    """
+    Bootstrap the mean of a sample by resampling within strata, e.g. MarketSize.
+
+    Rows are partitioned once into contiguous per-stratum arrays and every
+    stratum is resampled in a vectorized batch at its original size, so the
+    stratum mix cannot drift between replicates.
+
+    Parameters:
+        data (array-like): The observations to resample.
+        strata (array-like): Stratum label of every observation.
+        num_resamples (int, optional): Number of bootstrap resamples. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+        method (str, optional): Resampling method, see ``bootstrap_mean_ci``. Defaults to 'auto'.
+
+    Returns:
+        tuple: (resample means as np.ndarray, (lower, upper) confidence bounds).
+    """
+
+    rng = np.random.default_rng(rng)
+    resample_means = _stratified_resample_means(
+        data, strata, num_resamples, rng, method, max_memory_bytes
+    )
+    return resample_means, _percentile_ci(resample_means, confidence_level)
+
+
+def stratified_bootstrap_diff_ci(
+    a,
+    strata_a,
+    b,
+    strata_b,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+    method: str = "auto",
+) -> tuple:
+    """
+    Bootstrap the difference of means between two samples, resampling each within its strata.
+
+    Parameters:
+        a (array-like): Observations of the first group.
+        strata_a (array-like): Stratum label of every observation in ``a``.
+        b (array-like): Observations of the second group.
+        strata_b (array-like): Stratum label of every observation in ``b``.
+        num_resamples (int, optional): Number of bootstrap resamples. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+        method (str, optional): Resampling method, see ``bootstrap_mean_ci``. Defaults to 'auto'.
+
+    Returns:
+        tuple: (mean differences a - b as np.ndarray, (lower, upper) confidence bounds).
+    """
+
+    rng = np.random.default_rng(rng)
+    means_a = _stratified_resample_means(
+        a, strata_a, num_resamples, rng, method, max_memory_bytes
+    )
+    means_b = _stratified_resample_means(
+        b, strata_b, num_resamples, rng, method, max_memory_bytes
+    )
+    means_diff = means_a - means_b
+    return means_diff, _percentile_ci(means_diff, confidence_level)
+
+
+def _as_metric_frame(data) -> pd.DataFrame:
+    """
+    Convert a DataFrame or 2-D array of metrics into a float DataFrame.
+
+    Parameters:
+        data (pd.DataFrame or array-like): Observations as rows and metrics as columns.
+
+    Returns:
+        pd.DataFrame: The metrics as float columns.
+    """
+
+    if not isinstance(data, pd.DataFrame):
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError("Multi-metric bootstrap input must be two-dimensional.")
+        data = pd.DataFrame(data)
+    if data.empty:
+        raise ValueError("Bootstrap input must contain at least one observation.")
+    return data.astype(float)
+
+
+def _multi_metric_resample_means(
+    values: np.ndarray,
+    num_resamples: int,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> np.ndarray:
+    """
+    Draw bootstrap resample means of every metric from one set of resample weights.
+
+    Each replicate's resample counts are built once with ``np.bincount`` and
+    applied to all metric columns in a single matrix product.
+
+    Parameters:
+        values (np.ndarray): Observations as rows and metrics as columns.
+        num_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws.
+
+    Returns:
+        np.ndarray: Resample means with one row per resample and one column per metric.
+    """
+
+    n_obs, n_metrics = values.shape
+    resample_means = np.empty((num_resamples, n_metrics))
+
+    # One int64 index, one int64 count and one float64 weight per element.
+    if 24 * n_obs > max_memory_bytes:
+        # A single replicate's weights do not fit in the budget, so gather the
+        # drawn rows in chunks of observations and sum them instead.
+        cols = max(1, max_memory_bytes // (8 * (n_metrics + 1)))
+        for row in range(num_resamples):
+            sums = np.zeros(n_metrics)
+            for col_start in range(0, n_obs, cols):
+                idx = rng.integers(0, n_obs, size=min(cols, n_obs - col_start))
+                sums += values[idx].sum(axis=0)
+            resample_means[row] = sums / n_obs
+        return resample_means
+
+    rows = max(1, min(num_resamples, max_memory_bytes // (24 * n_obs)))
+    for start in range(0, num_resamples, rows):
+        stop = min(start + rows, num_resamples)
+        idx = rng.integers(0, n_obs, size=(stop - start, n_obs))
+        idx += np.arange(stop - start)[:, None] * n_obs
+        weights = np.bincount(idx.ravel(), minlength=(stop - start) * n_obs)
+        weights = weights.reshape(stop - start, n_obs).astype(float)
+        resample_means[start:stop] = weights @ values / n_obs
+
+    return resample_means
+
+
+def bootstrap_metrics_ci(
+    a,
+    b=None,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+) -> tuple:
+    """
+    Jointly bootstrap the means of many metrics, sharing resample weights across metrics.
+
+    Every replicate draws one set of resample weights per arm and applies it
+    to all metric columns at once, which keeps the correlation between
+    metrics and pays the index-generation cost once instead of per metric.
+
+    Parameters:
+        a (pd.DataFrame or array-like): Observations of the first arm, one column per metric.
+        b (pd.DataFrame or array-like, optional): Observations of the second arm with the same
+            metric columns. Defaults to None.
+        num_resamples (int, optional): Number of bootstrap resamples. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        max_memory_bytes (int, optional): Memory budget for a single chunk of draws. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+
+    Returns:
+        tuple: (pd.DataFrame of resample means with one column per metric, or per
+            ('a' | 'b' | 'diff', metric) pair when ``b`` is given; pd.DataFrame with
+            'lower' and 'upper' confidence bounds for every column).
+    """
+
+    rng = np.random.default_rng(rng)
+    a = _as_metric_frame(a)
+    means_a = _multi_metric_resample_means(a.to_numpy(), num_resamples, rng, max_memory_bytes)
+
+    if b is None:
+        resample_means = pd.DataFrame(means_a, columns=a.columns)
+    else:
+        b = _as_metric_frame(b)
+        if list(b.columns) != list(a.columns):
+            raise ValueError("Both arms must have the same metric columns.")
+        means_b = _multi_metric_resample_means(
+            b.to_numpy(), num_resamples, rng, max_memory_bytes
+        )
+        resample_means = pd.concat(
+            {
+                "a": pd.DataFrame(means_a, columns=a.columns),
+                "b": pd.DataFrame(means_b, columns=a.columns),
+                "diff": pd.DataFrame(means_a - means_b, columns=a.columns),
+            },
+            axis=1,
+        )
+
+    lower, upper = _percentile_ci(resample_means.to_numpy(), confidence_level)
+    ci = pd.DataFrame({"lower": lower, "upper": upper}, index=resample_means.columns)
+    return resample_means, ci
+
+
+def _accumulate_poisson_weights(
+    values: np.ndarray,
+    sums: np.ndarray,
+    counts: np.ndarray,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> None:
+    """
+    Add Poisson(1)-weighted sums and counts of a block of rows to per-replicate totals in place.
+
+    Parameters:
+        values (np.ndarray): Observations of the current block.
+        sums (np.ndarray): Running weighted sum for every replicate.
+        counts (np.ndarray): Running total weight for every replicate.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single block of weights.
+
+    Returns:
+        None
+    """
+
+    num_resamples = len(sums)
+    # int64 weights plus the float64 copy that ``weights @ block`` upcasts them to.
+    rows = max(1, max_memory_bytes // (16 * num_resamples))
+    for start in range(0, len(values), rows):
+        block = values[start : start + rows]
+        weights = rng.poisson(1.0, size=(num_resamples, len(block)))
+        sums += weights @ block
+        counts += weights.sum(axis=1)
+
+
+def poisson_bootstrap_mean_ci(
+    chunks,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+) -> tuple:
+    """
+    Bootstrap the mean of a stream of observations in a single pass with Poisson(1) weights.
+
+    Every row gets an independent Poisson(1) weight per replicate, so the
+    replicates can be accumulated chunk by chunk and memory is O(num_resamples)
+    regardless of the number of rows.
+
+    Parameters:
+        chunks (iterable): Iterable of array-like chunks of observations.
+        num_resamples (int, optional): Number of bootstrap replicates. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        max_memory_bytes (int, optional): Memory budget for a single block of weights. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+
+    Returns:
+        tuple: (resample means as np.ndarray, (lower, upper) confidence bounds).
+    """
+
+    rng = np.random.default_rng(rng)
+    sums = np.zeros(num_resamples)
+    counts = np.zeros(num_resamples)
+
+    for chunk in chunks:
+        values = np.asarray(chunk, dtype=float)
+        _accumulate_poisson_weights(values, sums, counts, rng, max_memory_bytes)
+
+    if not counts.all():
+        raise ValueError("Poisson bootstrap needs at least one observation per replicate.")
+    resample_means = sums / counts
+    return resample_means, _percentile_ci(resample_means, confidence_level)
+
+
+def poisson_bootstrap_csv(
+    file_path: str,
+    column: str,
+    group_col: str = None,
+    group_value=None,
+    num_resamples: int = 5000,
+    confidence_level: float = 0.95,
+    chunksize: int = DEFAULT_CSV_CHUNKSIZE,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+) -> tuple:
+    """
+    Stream a CSV file and bootstrap the mean of one column with ``poisson_bootstrap_mean_ci``.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        column (str): The metric column to bootstrap.
+        group_col (str, optional): Column used to select one arm, e.g. 'version'. Defaults to None.
+        group_value (optional): Value of ``group_col`` to keep, e.g. 'gate_30'. Defaults to None.
+        num_resamples (int, optional): Number of bootstrap replicates. Defaults to 5000.
+        confidence_level (float, optional): Confidence level. Defaults to 0.95.
+        chunksize (int, optional): Number of CSV rows read at a time. Defaults to 1,000,000.
+        max_memory_bytes (int, optional): Memory budget for a single block of weights. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+
+    Returns:
+        tuple: (resample means as np.ndarray, (lower, upper) confidence bounds).
+    """
+
+    usecols = [column] if group_col is None else [column, group_col]
+
+    def column_chunks():
+        for chunk in pd.read_csv(file_path, usecols=usecols, chunksize=chunksize):
+            if group_col is not None:
+                chunk = chunk[chunk[group_col] == group_value]
+            yield chunk[column].to_numpy()
+
+    return poisson_bootstrap_mean_ci(
+        column_chunks(), num_resamples, confidence_level, max_memory_bytes, rng
+    )
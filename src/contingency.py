@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+
+# Relative tolerance used when comparing table probabilities, as in scipy.stats.fisher_exact.
+_FISHER_RELATIVE_TOLERANCE = 1e-7
+
+
+def _bisect_first(condition, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Find, element-wise, the smallest integer in [lower, upper] where a monotone condition holds.
+
+    The condition must be False then True over the range and True at ``upper``.
+
+    Parameters:
+        condition (callable): Vectorized predicate on integer arrays.
+        lower (np.ndarray): Lower ends of the search ranges.
+        upper (np.ndarray): Upper ends of the search ranges.
+
+    Returns:
+        np.ndarray: The first integer where the condition holds.
+    """
+
+    lower, upper = lower.copy(), upper.copy()
+    while np.any(lower < upper):
+        middle = (lower + upper) // 2
+        holds = condition(middle)
+        upper = np.where(holds, middle, upper)
+        lower = np.where(holds, lower, middle + 1)
+    return lower
+
+
+def _bisect_last(condition, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Find, element-wise, the largest integer in [lower, upper] where a monotone condition holds.
+
+    The condition must be True then False over the range and True at ``lower``.
+
+    Parameters:
+        condition (callable): Vectorized predicate on integer arrays.
+        lower (np.ndarray): Lower ends of the search ranges.
+        upper (np.ndarray): Upper ends of the search ranges.
+
+    Returns:
+        np.ndarray: The last integer where the condition holds.
+    """
+
+    lower, upper = lower.copy(), upper.copy()
+    while np.any(lower < upper):
+        middle = (lower + upper + 1) // 2
+        holds = condition(middle)
+        lower = np.where(holds, middle, lower)
+        upper = np.where(holds, upper, middle - 1)
+    return upper
+
+
+def _fisher_exact_p_values(
+    successes_a: np.ndarray,
+    trials_a: np.ndarray,
+    successes_b: np.ndarray,
+    trials_b: np.ndarray,
+) -> np.ndarray:
+    """
+    Two-sided Fisher exact p-values for many 2x2 tables at once.
+
+    With the margins fixed, the successes of arm a follow a hypergeometric
+    distribution. The p-value sums the tail containing the observed table and
+    the opposite tail from the first table that is no more likely; that table
+    is found by a vectorized bisection on the monotone side of the mode, so the
+    cost is O(log n) hypergeometric evaluations per table.
+
+    Parameters:
+        successes_a (np.ndarray): Successes in arm a.
+        trials_a (np.ndarray): Trials in arm a.
+        successes_b (np.ndarray): Successes in arm b.
+        trials_b (np.ndarray): Trials in arm b.
+
+    Returns:
+        np.ndarray: Two-sided p-values.
+    """
+
+    total = trials_a + trials_b
+    total_successes = successes_a + successes_b
+    distribution = stats.hypergeom(total, total_successes, trials_a)
+
+    x = successes_a
+    support_min = np.maximum(0, trials_a - (total - total_successes))
+    support_max = np.minimum(total_successes, trials_a)
+    mode = ((trials_a + 1) * (total_successes + 1)) // (total + 2)
+    threshold = distribution.logpmf(x) + np.log1p(_FISHER_RELATIVE_TOLERANCE)
+
+    def no_more_likely(k):
+        return distribution.logpmf(k) <= threshold
+
+    p_values = np.ones(x.shape)
+
+    below = x < mode
+    upper_tail_empty = ~no_more_likely(support_max)
+    first = _bisect_first(no_more_likely, np.where(below, mode, support_max), support_max)
+    p_below = distribution.cdf(x) + np.where(
+        upper_tail_empty, 0.0, distribution.sf(first - 1)
+    )
+    p_values = np.where(below, p_below, p_values)
+
+    above = x > mode
+    lower_tail_empty = ~no_more_likely(support_min)
+    last = _bisect_last(no_more_likely, support_min, np.where(above, mode, support_min))
+    p_above = distribution.sf(x - 1) + np.where(
+        lower_tail_empty, 0.0, distribution.cdf(last)
+    )
+    p_values = np.where(above, p_above, p_values)
+
+    return np.minimum(p_values, 1.0)
+
+
+def proportion_tests(
+    successes_a, trials_a, successes_b, trials_b, correction: bool = True
+) -> pd.DataFrame:
+    """
+    Compare two proportions from counts with chi-square, Fisher exact and z-tests.
+
+    Every argument may be a scalar or an array, so thousands of segment tables
+    can be evaluated in one call without materializing any rows.
+
+    Parameters:
+        successes_a (int or array-like): Successes in arm a, e.g. retained gate_30 users.
+        trials_a (int or array-like): Trials in arm a, e.g. gate_30 users.
+        successes_b (int or array-like): Successes in arm b.
+        trials_b (int or array-like): Trials in arm b.
+        correction (bool, optional): Apply Yates' continuity correction to the chi-square test,
+            as chi2_contingency does for 2x2 tables. Defaults to True.
+
+    Returns:
+        pd.DataFrame: Proportions, chi-square statistic and p-value, Fisher exact p-value,
+            and pooled z statistic and p-value, one row per table.
+    """
+
+    index = getattr(successes_a, "index", None)
+    successes_a, trials_a, successes_b, trials_b = (
+        np.atleast_1d(np.asarray(value, dtype=np.int64))
+        for value in np.broadcast_arrays(successes_a, trials_a, successes_b, trials_b)
+    )
+    if np.any(successes_a > trials_a) or np.any(successes_b > trials_b):
+        raise ValueError("Successes cannot exceed trials.")
+
+    total = trials_a + trials_b
+    pooled = (successes_a + successes_b) / total
+    p_a = successes_a / trials_a
+    p_b = successes_b / trials_b
+
+    observed = np.stack(
+        [successes_a, trials_a - successes_a, successes_b, trials_b - successes_b]
+    )
+    expected = np.stack(
+        [
+            trials_a * pooled,
+            trials_a * (1 - pooled),
+            trials_b * pooled,
+            trials_b * (1 - pooled),
+        ]
+    )
+    deviation = np.abs(observed - expected)
+    if correction:
+        deviation = deviation - np.minimum(0.5, deviation)
+
+    # Tables with no successes or no failures have no defined statistic and yield NaN.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chi2 = np.sum(deviation**2 / expected, axis=0)
+        z = (p_a - p_b) / np.sqrt(pooled * (1 - pooled) * (1 / trials_a + 1 / trials_b))
+
+    return pd.DataFrame(
+        {
+            "p_a": p_a,
+            "p_b": p_b,
+            "chi2": chi2,
+            "chi2_p_value": stats.chi2.sf(chi2, df=1),
+            "fisher_p_value": _fisher_exact_p_values(
+                successes_a, trials_a, successes_b, trials_b
+            ),
+            "z": z,
+            "z_p_value": 2 * stats.norm.sf(np.abs(z)),
+        },
+        index=index,
+    )
@@ -0,0 +1,531 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+# Rows read at a time when streaming CSV files, shared by the streaming
+# bootstrap and the per-arm aggregation.
+DEFAULT_CSV_CHUNKSIZE = 1_000_000
+
+_CACHE_META_FILE = "meta.json"
+
+# Every rebuild writes its column files into a new directory with this prefix,
+# so arrays still memory-mapped from an older version are never overwritten.
+_COLUMN_VERSION_PREFIX = "columns-"
+
+# String columns with at most this share of distinct values become categories.
+DEFAULT_MAX_CATEGORY_RATIO = 0.5
+
+
+def _default_cache_dir(file_path: str) -> str:
+    """
+    Cache directory used for a CSV file when none is given.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+
+    Returns:
+        str: A '.cache/<file name>' directory next to the CSV file.
+    """
+
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, ".cache", os.path.splitext(file_name)[0])
+
+
+def _source_signature(file_path: str) -> dict:
+    """
+    Size and modification time that identify the current version of a file.
+
+    Parameters:
+        file_path (str): Path to the file.
+
+    Returns:
+        dict: The file size in bytes and modification time in nanoseconds.
+    """
+
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _dtype_signature(dtype):
+    """
+    JSON-serializable form of a ``dtype`` argument to pd.read_csv.
+
+    Parameters:
+        dtype (dict or dtype): Column dtypes, or one dtype for every column.
+
+    Returns:
+        dict, str or None: The dtype names.
+    """
+
+    if dtype is None:
+        return None
+    if isinstance(dtype, dict):
+        return {str(col): str(pd.api.types.pandas_dtype(d)) for col, d in dtype.items()}
+    return str(pd.api.types.pandas_dtype(dtype))
+
+
+def _read_cache_meta(cache_dir: str) -> dict:
+    """
+    Read the metadata of a column cache.
+
+    Parameters:
+        cache_dir (str): The cache directory.
+
+    Returns:
+        dict: The cache metadata, or None if there is no complete cache.
+    """
+
+    meta_path = os.path.join(cache_dir, _CACHE_META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        return None
+
+
+def _write_column_version(
+    df: pd.DataFrame, directory: str, meta: dict, pack_bools: bool = False
+) -> None:
+    """
+    Save a DataFrame as a new version of a column directory and switch to it atomically.
+
+    The columns go into a fresh versioned subdirectory and ``meta.json`` is
+    replaced in one ``os.replace``, so readers see either the old or the new
+    version. Files of older versions get new inodes rather than being
+    overwritten, so frames that still map them keep their data. Older
+    versions are then removed where the platform allows it.
+
+    Parameters:
+        df (pd.DataFrame): The data to save.
+        directory (str): The cache or store directory.
+        meta (dict): Metadata to store alongside the column entries.
+        pack_bools (bool, optional): Store bool columns bit-packed. Defaults to False.
+
+    Returns:
+        None
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    data_dir = tempfile.mkdtemp(prefix=_COLUMN_VERSION_PREFIX, dir=directory)
+    columns = _save_columns(df, data_dir, pack_bools=pack_bools)
+    meta = {**meta, "data_dir": os.path.basename(data_dir), "columns": columns}
+
+    fd, temp_path = tempfile.mkstemp(suffix=".json", dir=directory)
+    with os.fdopen(fd, "w") as f:
+        json.dump(meta, f)
+    os.replace(temp_path, os.path.join(directory, _CACHE_META_FILE))
+
+    # Unlinking mapped files is safe on POSIX; where it is not (Windows), the
+    # old version stays until a later rebuild can remove it.
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(_COLUMN_VERSION_PREFIX) and path != data_dir:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _column_dir(directory: str, meta: dict) -> str:
+    """
+    Directory holding the column files of the current version.
+
+    Parameters:
+        directory (str): The cache or store directory.
+        meta (dict): Its metadata.
+
+    Returns:
+        str: The versioned column directory.
+    """
+
+    return os.path.join(directory, meta.get("data_dir", ""))
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    """
+    Check whether a column holds strings (object or string dtype).
+
+    Parameters:
+        series (pd.Series): The column.
+
+    Returns:
+        bool: True for string columns.
+    """
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def compact_dtypes(
+    df: pd.DataFrame,
+    categories: list = None,
+    max_category_ratio: float = DEFAULT_MAX_CATEGORY_RATIO,
+    verbose: bool = False,
+) -> pd.DataFrame:
+    """
+    Shrink a DataFrame's memory by choosing the smallest safe dtype per column.
+
+    Integer columns are downcast to the narrowest integer type that holds their
+    minimum and maximum, and low-cardinality string columns (e.g. 'version',
+    'MarketSize') are converted to category. Float and bool columns are kept.
+
+    Parameters:
+        df (pd.DataFrame): The data to compact.
+        categories (list, optional): Extra columns to convert to category regardless of dtype,
+            e.g. ['Promotion']. Defaults to None.
+        max_category_ratio (float, optional): String columns with at most this share of
+            distinct values become categories. Defaults to 0.5.
+        verbose (bool, optional): Print memory usage before and after. Defaults to False.
+
+    Returns:
+        pd.DataFrame: The data with compact dtypes.
+    """
+
+    categories = set(categories or [])
+    compacted = {}
+    for col in df.columns:
+        series = df[col]
+        if col in categories:
+            series = series.astype("category")
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            series = pd.to_numeric(series, downcast="integer")
+        elif _is_string_column(series) and (
+            series.nunique() <= max_category_ratio * len(series)
+        ):
+            series = series.astype("category")
+        compacted[col] = series
+
+    compacted = pd.DataFrame(compacted, index=df.index)
+    if verbose:
+        report = memory_report(df, compacted)
+        before, after = report.loc["Total", ["before", "after"]]
+        print(
+            f"Memory usage: {before / 1024**2:.2f} MB -> {after / 1024**2:.2f} MB "
+            f"({before / max(after, 1):.1f}x smaller)"
+        )
+    return compacted
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the memory usage of two versions of a DataFrame column by column.
+
+    Parameters:
+        before (pd.DataFrame): The original data.
+        after (pd.DataFrame): The same data with different dtypes.
+
+    Returns:
+        pd.DataFrame: Dtypes and bytes before and after for every column, plus a 'Total' row.
+    """
+
+    report = pd.DataFrame(
+        {
+            "dtype_before": before.dtypes.astype(str),
+            "dtype_after": after.dtypes.astype(str),
+            "before": before.memory_usage(deep=True, index=False),
+            "after": after.memory_usage(deep=True, index=False),
+        }
+    )
+    report.loc["Total", ["before", "after"]] = report[["before", "after"]].sum()
+    report["ratio"] = report["before"] / report["after"]
+    return report
+
+
+def _save_columns(df: pd.DataFrame, directory: str, pack_bools: bool = False) -> list:
+    """
+    Save every column of a DataFrame as a .npy file.
+
+    Categorical and string columns are stored as integer codes with their
+    categories in the returned entries; other columns keep their NumPy dtype.
+
+    Parameters:
+        df (pd.DataFrame): The data to save.
+        directory (str): Target directory.
+        pack_bools (bool, optional): Store bool columns bit-packed, eight values per byte.
+            Packed columns are unpacked into memory when loaded. Defaults to False.
+
+    Returns:
+        list: One metadata entry per column.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if _is_string_column(series):
+            series = series.astype("category")
+
+        file_name = f"{i}.npy"
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(directory, file_name), series.cat.codes.to_numpy())
+            columns.append(
+                {
+                    "name": col,
+                    "file": file_name,
+                    "categories": series.cat.categories.tolist(),
+                    "ordered": bool(series.cat.ordered),
+                }
+            )
+        elif pack_bools and series.dtype == bool:
+            np.save(os.path.join(directory, file_name), np.packbits(series.to_numpy()))
+            columns.append({"name": col, "file": file_name, "packed": len(series)})
+        else:
+            np.save(os.path.join(directory, file_name), series.to_numpy())
+            columns.append({"name": col, "file": file_name})
+
+    return columns
+
+
+def _load_column(directory: str, entry: dict, mmap_mode: str = "c"):
+    """
+    Memory-map one saved column.
+
+    Parameters:
+        directory (str): Directory holding the column files.
+        entry (dict): The column's metadata entry.
+        mmap_mode (str, optional): Mode passed to np.load. Defaults to 'c' (copy-on-write).
+
+    Returns:
+        np.ndarray or pd.Categorical: The column values.
+    """
+
+    values = np.load(os.path.join(directory, entry["file"]), mmap_mode=mmap_mode)
+    if "packed" in entry:
+        values = np.unpackbits(values, count=entry["packed"]).view(bool)
+    if "categories" in entry:
+        values = pd.Categorical.from_codes(
+            values, categories=entry["categories"], ordered=entry["ordered"]
+        )
+    return values
+
+
+def _write_column_cache(
+    df: pd.DataFrame, cache_dir: str, source: dict, compact: bool = False, dtype=None
+) -> None:
+    """
+    Save a DataFrame as a column cache of a source file.
+
+    Parameters:
+        df (pd.DataFrame): The data to cache.
+        cache_dir (str): The cache directory.
+        source (dict): Signature of the source file.
+        compact (bool, optional): Whether the data was compacted; bool columns are then
+            stored bit-packed. Defaults to False.
+        dtype (dict or str, optional): Signature of the dtypes the CSV was parsed with.
+            Defaults to None.
+
+    Returns:
+        None
+    """
+
+    _write_column_version(
+        df,
+        cache_dir,
+        {"source": source, "compact": compact, "dtype": dtype},
+        pack_bools=compact,
+    )
+
+
+def _read_column_cache(cache_dir: str, meta: dict, columns: list = None) -> pd.DataFrame:
+    """
+    Load selected columns of a column cache as memory-mapped arrays.
+
+    Parameters:
+        cache_dir (str): The cache directory.
+        meta (dict): The cache metadata.
+        columns (list, optional): Columns to load. Defaults to all columns.
+
+    Returns:
+        pd.DataFrame: The cached data.
+    """
+
+    entries = {entry["name"]: entry for entry in meta["columns"]}
+    if columns is None:
+        columns = list(entries)
+    missing = [col for col in columns if col not in entries]
+    if missing:
+        raise KeyError(f"Columns not in dataset: {missing}")
+
+    # Copy-on-write mapping: pages are read lazily and edits stay private.
+    data_dir = _column_dir(cache_dir, meta)
+    data = {col: _load_column(data_dir, entries[col]) for col in columns}
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def load_dataset(
+    file_path: str,
+    columns: list = None,
+    cache_dir: str = None,
+    dtype: dict = None,
+    refresh: bool = False,
+    compact: bool = False,
+    verbose: bool = False,
+) -> pd.DataFrame:
+    """
+    Load a CSV file through a columnar on-disk cache.
+
+    The first load parses the CSV and saves every column as a .npy file, with
+    string and category columns stored as category codes. Later loads
+    memory-map only the requested columns instead of parsing text. The cache
+    is rebuilt automatically when the CSV file's size or modification time
+    changes, or when it was built with a different ``dtype``. With ``compact=True`` the data is passed through
+    ``compact_dtypes`` before caching and bool columns are stored bit-packed.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        columns (list, optional): Columns to load. Defaults to all columns.
+        cache_dir (str, optional): Cache directory. Defaults to '.cache/<file name>' next to the CSV.
+        dtype (dict, optional): Column dtypes passed to pd.read_csv when the cache is built.
+            Defaults to None.
+        refresh (bool, optional): Rebuild the cache even if it is up to date. Defaults to False.
+        compact (bool, optional): Downcast integers and convert low-cardinality strings to
+            category. Defaults to False.
+        verbose (bool, optional): Print memory usage before and after compaction when the
+            cache is built. Defaults to False.
+
+    Returns:
+        pd.DataFrame: The requested columns.
+    """
+
+    if cache_dir is None:
+        cache_dir = _default_cache_dir(file_path)
+
+    source = _source_signature(file_path)
+    dtype_signature = _dtype_signature(dtype)
+    meta = None if refresh else _read_cache_meta(cache_dir)
+    if (
+        meta is None
+        or meta["source"] != source
+        or meta.get("compact", False) != compact
+        or meta.get("dtype") != dtype_signature
+    ):
+        df = pd.read_csv(file_path, dtype=dtype)
+        if compact:
+            df = compact_dtypes(df, verbose=verbose)
+        _write_column_cache(df, cache_dir, source, compact, dtype_signature)
+        meta = _read_cache_meta(cache_dir)
+
+    return _read_column_cache(cache_dir, meta, columns)
+
+
+class ArmColumnStore:
+    """
+    On-disk column store with rows sorted by experiment arm.
+
+    Every column is a memory-mapped .npy file and an offsets index records
+    where each arm's rows start and end, so selecting one arm's metric is a
+    zero-copy slice instead of a boolean mask and copy over the whole frame.
+    The slices can be passed directly to the bootstrap and test functions.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Open an existing store.
+
+        Parameters:
+            directory (str): Directory created by ``ArmColumnStore.build``.
+        """
+
+        self.directory = directory
+        with open(os.path.join(directory, _CACHE_META_FILE), "r") as f:
+            meta = json.load(f)
+        self._data_dir = _column_dir(directory, meta)
+
+        self.arm_col = meta["arm_col"]
+        self.arms = meta["arms"]
+        self._offsets = dict(zip(self.arms, zip(meta["offsets"][:-1], meta["offsets"][1:])))
+        self._entries = {entry["name"]: entry for entry in meta["columns"]}
+        self._columns = {}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, arm_col: str, directory: str) -> "ArmColumnStore":
+        """
+        Sort a DataFrame by arm once and save it as a column store.
+
+        Parameters:
+            df (pd.DataFrame): The experiment data.
+            arm_col (str): Column holding the arm label, e.g. 'version'.
+            directory (str): Directory to write the store to.
+
+        Returns:
+            ArmColumnStore: The opened store.
+        """
+
+        codes, arms = pd.factorize(df[arm_col], sort=True)
+        if (codes < 0).any():
+            raise ValueError("Arm labels must not contain missing values.")
+        order = np.argsort(codes, kind="stable")
+        offsets = np.zeros(len(arms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(arms)), out=offsets[1:])
+
+        _write_column_version(
+            df.drop(columns=[arm_col]).iloc[order],
+            directory,
+            {
+                "arm_col": arm_col,
+                "arms": np.asarray(arms).tolist(),
+                "offsets": offsets.tolist(),
+            },
+        )
+        return cls(directory)
+
+    @property
+    def columns(self) -> list:
+        """Names of the stored columns, excluding the arm column."""
+
+        return list(self._entries)
+
+    def _column(self, column: str):
+        """
+        Memory-map a column once and reuse the mapping.
+
+        Parameters:
+            column (str): Column name.
+
+        Returns:
+            np.ndarray or pd.Categorical: The whole column, sorted by arm.
+        """
+
+        if column not in self._entries:
+            raise KeyError(f"Unknown column: {column!r}")
+        if column not in self._columns:
+            self._columns[column] = _load_column(
+                self._data_dir, self._entries[column], mmap_mode="r"
+            )
+        return self._columns[column]
+
+    def get(self, arm, column: str):
+        """
+        Return one arm's values of a column as a zero-copy slice.
+
+        Parameters:
+            arm: The arm label, e.g. 'gate_30'.
+            column (str): Column name, e.g. 'retention_1'.
+
+        Returns:
+            np.ndarray or pd.Categorical: Read-only view of the arm's values.
+        """
+
+        if arm not in self._offsets:
+            raise KeyError(f"Unknown arm: {arm!r}")
+        start, stop = self._offsets[arm]
+        return self._column(column)[start:stop]
+
+    def size(self, arm) -> int:
+        """
+        Number of rows of an arm.
+
+        Parameters:
+            arm: The arm label.
+
+        Returns:
+            int: The arm's row count.
+        """
+
+        start, stop = self._offsets[arm]
+        return stop - start
@@ -0,0 +1,279 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Memory budget for a single chunk of resampling or permutation draws,
+# shared by the bootstrap and permutation modules.
+DEFAULT_MAX_MEMORY_BYTES = 256 * 1024**2
+
+# Arrays at least this large are passed to workers through shared memory
+# instead of being pickled into every task.
+SHARE_MIN_BYTES = 1024**2
+
+SharedArrayHandle = namedtuple("SharedArrayHandle", ["name", "shape", "dtype"])
+
+# Shared memory blocks attached by this process, keyed by block name.
+_attached_arrays = {}
+
+
+def resolve_workers(workers: int = 1) -> int:
+    """
+    Translate a ``workers`` argument into a number of processes.
+
+    Parameters:
+        workers (int, optional): Requested number of workers; None or 1 runs serially,
+            -1 uses every available core. Defaults to 1.
+
+    Returns:
+        int: Number of worker processes to use.
+    """
+
+    if workers is None:
+        return 1
+    if workers == -1:
+        return os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be a positive integer or -1.")
+    return int(workers)
+
+
+def split_count(total: int, parts: int) -> list:
+    """
+    Split a total into near-equal non-negative integer parts.
+
+    Parameters:
+        total (int): The total to split.
+        parts (int): Number of parts.
+
+    Returns:
+        list: Part sizes that sum to ``total``.
+    """
+
+    base, extra = divmod(total, parts)
+    return [base + 1 if i < extra else base for i in range(parts)]
+
+
+def spawn_generators(rng: np.random.Generator, n: int) -> list:
+    """
+    Create independent child generators from the seed sequence of a generator.
+
+    Parameters:
+        rng (np.random.Generator): Parent generator.
+        n (int): Number of child generators.
+
+    Returns:
+        list: Independent np.random.Generator instances.
+    """
+
+    seed_seq = rng.bit_generator.seed_seq
+    bit_generator = type(rng.bit_generator)
+    return [np.random.Generator(bit_generator(child)) for child in seed_seq.spawn(n)]
+
+
+class SharedArray:
+    """
+    Copy of a NumPy array placed in shared memory for the lifetime of a ``with`` block.
+
+    Worker processes receive only ``handle`` and map the block zero-copy with
+    ``attach_shared_array``.
+    """
+
+    def __init__(self, array: np.ndarray) -> None:
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)[...] = array
+        self.handle = SharedArrayHandle(self._shm.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        """
+        Release and remove the shared memory block.
+
+        Returns:
+            None
+        """
+
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def attach_shared_array(handle: SharedArrayHandle) -> np.ndarray:
+    """
+    Map a shared memory block as a read-only NumPy array without copying it.
+
+    Blocks stay attached for the life of the process, so repeated tasks on the
+    same array pay the attach cost once.
+
+    Parameters:
+        handle (SharedArrayHandle): Handle created by ``SharedArray``.
+
+    Returns:
+        np.ndarray: A view of the shared data.
+    """
+
+    if handle.name not in _attached_arrays:
+        shm = shared_memory.SharedMemory(name=handle.name)
+        array = np.ndarray(handle.shape, dtype=handle.dtype, buffer=shm.buf)
+        array.flags.writeable = False
+        _attached_arrays[handle.name] = (shm, array)
+    return _attached_arrays[handle.name][1]
+
+
+def _share_arrays(args, shared: dict, stack: ExitStack):
+    """
+    Replace large arrays in a (possibly nested) argument tuple with shared memory handles.
+
+    Parameters:
+        args: A task argument or tuple of arguments.
+        shared (dict): Already shared arrays keyed by id, reused across tasks.
+        stack (ExitStack): Stack that releases the shared blocks on exit.
+
+    Returns:
+        The arguments with large arrays swapped for handles.
+    """
+
+    if isinstance(args, tuple) and not isinstance(args, SharedArrayHandle):
+        return tuple(_share_arrays(arg, shared, stack) for arg in args)
+    if (
+        isinstance(args, np.ndarray)
+        and not args.dtype.hasobject
+        and args.nbytes >= SHARE_MIN_BYTES
+    ):
+        if id(args) not in shared:
+            shared[id(args)] = (args, stack.enter_context(SharedArray(args)).handle)
+        return shared[id(args)][1]
+    return args
+
+
+def _attach_arrays(args):
+    """
+    Replace shared memory handles in a (possibly nested) argument tuple with array views.
+
+    Parameters:
+        args: A task argument or tuple of arguments.
+
+    Returns:
+        The arguments with handles swapped for arrays.
+    """
+
+    if isinstance(args, SharedArrayHandle):
+        return attach_shared_array(args)
+    if isinstance(args, tuple):
+        return tuple(_attach_arrays(arg) for arg in args)
+    return args
+
+
+def _call_with_shared_arrays(func, *args):
+    """
+    Worker entry point that attaches shared arrays before calling ``func``.
+
+    Parameters:
+        func (callable): The task function.
+        *args: Task arguments, possibly containing shared memory handles.
+
+    Returns:
+        The result of ``func``.
+    """
+
+    return func(*_attach_arrays(args))
+
+
+class WorkerPool:
+    """
+    Process pool and shared memory blocks kept alive across ``parallel_map`` calls.
+
+    Callers that fan out many small batches (e.g. adaptive bootstrap stopping)
+    start the worker processes once and share every large array once, instead
+    of paying both costs on every call. Arrays are recognised by identity, so
+    the same array object passed in later tasks reuses its shared block.
+    """
+
+    def __init__(self, workers: int = 1) -> None:
+        """
+        Create a pool; processes are started on the first parallel call.
+
+        Parameters:
+            workers (int, optional): Number of worker processes, -1 for all cores. Defaults to 1.
+        """
+
+        self.workers = resolve_workers(workers)
+        self._executor = None
+        self._shared = {}
+        self._stack = ExitStack()
+
+    def map(self, func, tasks: list) -> list:
+        """
+        Apply a function to argument tuples on the pool's workers.
+
+        Parameters:
+            func (callable): A module-level function, so it can be pickled.
+            tasks (list): Argument tuples, one per call.
+
+        Returns:
+            list: Results in the same order as ``tasks``.
+        """
+
+        if min(self.workers, len(tasks)) <= 1:
+            return [func(*task) for task in tasks]
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        tasks = [_share_arrays(tuple(task), self._shared, self._stack) for task in tasks]
+        futures = [
+            self._executor.submit(_call_with_shared_arrays, func, *task) for task in tasks
+        ]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """
+        Stop the worker processes and release the shared memory blocks.
+
+        Returns:
+            None
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._stack.close()
+        self._shared.clear()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def parallel_map(func, tasks: list, workers: int = 1, pool: WorkerPool = None) -> list:
+    """
+    Apply a function to argument tuples, fanning out to a process pool when workers > 1.
+
+    Arrays of at least ``SHARE_MIN_BYTES`` are placed in shared memory once per
+    pool, so each task ships a small handle instead of pickling the data.
+
+    Parameters:
+        func (callable): A module-level function, so it can be pickled.
+        tasks (list): Argument tuples, one per call.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        pool (WorkerPool, optional): Pool to run on instead of a temporary one, so
+            processes and shared arrays are reused across calls. Defaults to None.
+
+    Returns:
+        list: Results in the same order as ``tasks``.
+    """
+
+    if pool is not None:
+        return pool.map(func, tasks)
+    with WorkerPool(workers) as pool:
+        return pool.map(func, tasks)
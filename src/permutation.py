@@ -0,0 +1,279 @@
+import numpy as np
+import pandas as pd
+
+from src.parallel import (
+    DEFAULT_MAX_MEMORY_BYTES,
+    parallel_map,
+    resolve_workers,
+    spawn_generators,
+    split_count,
+)
+
+
+def _p_value(
+    permuted_stats: np.ndarray, observed: float, alternative: str = "two-sided"
+) -> float:
+    """
+    Compute a permutation p-value, counting the observed labelling as one permutation.
+
+    Parameters:
+        permuted_stats (np.ndarray): Statistic under every permutation.
+        observed (float): Statistic under the original labels.
+        alternative (str, optional): 'two-sided', 'greater' or 'less'. Defaults to 'two-sided'.
+
+    Returns:
+        float: The permutation p-value.
+    """
+
+    # Tolerance so that permutations tying with the observed statistic are not
+    # lost to floating point rounding.
+    gamma = np.abs(observed) * 1e-12
+    if alternative == "two-sided":
+        extreme = np.abs(permuted_stats) >= np.abs(observed) - gamma
+    elif alternative == "greater":
+        extreme = permuted_stats >= observed - gamma
+    elif alternative == "less":
+        extreme = permuted_stats <= observed + gamma
+    else:
+        raise ValueError(f"Unknown alternative: {alternative!r}")
+    return (np.count_nonzero(extreme) + 1) / (len(permuted_stats) + 1)
+
+
+def _permuted_mean_diffs(
+    pooled: np.ndarray,
+    n_a: int,
+    num_permutations: int,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> np.ndarray:
+    """
+    Compute the difference of group means under random relabellings of a pooled sample.
+
+    Labels are shuffled in batches of rows of a 0/1 membership matrix, and the
+    first group's sum for every permutation is a single dot product with the
+    pooled observations.
+
+    Parameters:
+        pooled (np.ndarray): Observations of both groups, concatenated.
+        n_a (int): Size of the first group.
+        num_permutations (int): Number of permutations.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single batch of labels.
+
+    Returns:
+        np.ndarray: Mean of the first group minus mean of the second for every permutation.
+    """
+
+    n_obs = len(pooled)
+    n_b = n_obs - n_a
+    total = pooled.sum()
+    rows = max(1, min(num_permutations, max_memory_bytes // (8 * n_obs)))
+
+    base_labels = np.zeros(n_obs)
+    base_labels[:n_a] = 1
+    sums_a = np.empty(num_permutations)
+
+    for start in range(0, num_permutations, rows):
+        stop = min(start + rows, num_permutations)
+        labels = np.tile(base_labels, (stop - start, 1))
+        rng.permuted(labels, axis=1, out=labels)
+        sums_a[start:stop] = labels @ pooled
+
+    return sums_a / n_a - (total - sums_a) / n_b
+
+
+def permutation_test_mean_diff(
+    a,
+    b,
+    num_permutations: int = 10000,
+    alternative: str = "two-sided",
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+    workers: int = 1,
+) -> tuple:
+    """
+    Permutation test for the difference of means between two independent groups.
+
+    Permutations are generated in memory-bounded batches and, with
+    ``workers > 1``, split across a process pool where every worker draws from
+    its own ``SeedSequence.spawn`` child stream and reads the pooled sample from
+    shared memory.
+
+    Parameters:
+        a (array-like): Observations of the first group.
+        b (array-like): Observations of the second group.
+        num_permutations (int, optional): Number of permutations. Defaults to 10000.
+        alternative (str, optional): 'two-sided', 'greater' (mean of a > mean of b) or 'less'.
+            Defaults to 'two-sided'.
+        max_memory_bytes (int, optional): Memory budget for a single batch of labels. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+        workers (int, optional): Number of worker processes, -1 for all cores. Defaults to 1.
+
+    Returns:
+        tuple: (observed difference of means, p-value, permuted differences as np.ndarray).
+    """
+
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if a.size == 0 or b.size == 0:
+        raise ValueError("Both groups must contain at least one observation.")
+    rng = np.random.default_rng(rng)
+
+    pooled = np.concatenate([a, b])
+    observed = a.mean() - b.mean()
+
+    # Never start more workers than there are permutations, so no batch is empty.
+    workers = min(resolve_workers(workers), max(1, num_permutations))
+    if workers == 1:
+        permuted_diffs = _permuted_mean_diffs(
+            pooled, len(a), num_permutations, rng, max_memory_bytes
+        )
+    else:
+        tasks = [
+            (pooled, len(a), batch, batch_rng, max_memory_bytes // workers)
+            for batch, batch_rng in zip(
+                split_count(num_permutations, workers), spawn_generators(rng, workers)
+            )
+        ]
+        permuted_diffs = np.concatenate(
+            parallel_map(_permuted_mean_diffs, tasks, workers)
+        )
+
+    return observed, _p_value(permuted_diffs, observed, alternative), permuted_diffs
+
+
+def _f_statistics(
+    group_sums: np.ndarray, group_counts: np.ndarray, total: float, ss_total: float
+) -> np.ndarray:
+    """
+    Compute one-way ANOVA F statistics from per-group sums.
+
+    Group sizes, the grand total and the total sum of squares do not change
+    under relabelling, so only the group sums are needed per permutation.
+
+    Parameters:
+        group_sums (np.ndarray): Per-group sums, one row per labelling.
+        group_counts (np.ndarray): Number of observations in every group.
+        total (float): Sum of all observations.
+        ss_total (float): Total sum of squares around the grand mean.
+
+    Returns:
+        np.ndarray: The F statistic for every labelling.
+    """
+
+    n_obs = group_counts.sum()
+    n_groups = len(group_counts)
+    ss_between = np.sum(group_sums**2 / group_counts, axis=-1) - total**2 / n_obs
+    ss_within = ss_total - ss_between
+    return (ss_between / (n_groups - 1)) / (ss_within / (n_obs - n_groups))
+
+
+def _permuted_f_statistics(
+    values: np.ndarray,
+    codes: np.ndarray,
+    num_permutations: int,
+    rng: np.random.Generator,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+) -> np.ndarray:
+    """
+    Compute ANOVA F statistics under random relabellings of integer group codes.
+
+    Codes are shuffled for a batch of permutations at once, offset per
+    permutation, and all per-group sums of the batch come from one
+    ``np.bincount`` call.
+
+    Parameters:
+        values (np.ndarray): The observations.
+        codes (np.ndarray): Integer group code of every observation.
+        num_permutations (int): Number of permutations.
+        rng (np.random.Generator): Random number generator.
+        max_memory_bytes (int, optional): Memory budget for a single batch of labels.
+
+    Returns:
+        np.ndarray: The F statistic for every permutation.
+    """
+
+    n_obs = len(values)
+    group_counts = np.bincount(codes)
+    n_groups = len(group_counts)
+    total = values.sum()
+    ss_total = np.sum((values - total / n_obs) ** 2)
+
+    # Shuffled int64 codes plus a float64 copy of the weights per element.
+    rows = max(1, min(num_permutations, max_memory_bytes // (16 * n_obs)))
+    weights = np.tile(values, rows)
+    f_statistics = np.empty(num_permutations)
+
+    for start in range(0, num_permutations, rows):
+        stop = min(start + rows, num_permutations)
+        batch = stop - start
+        shuffled = np.tile(codes.astype(np.int64), (batch, 1))
+        rng.permuted(shuffled, axis=1, out=shuffled)
+        shuffled += np.arange(batch)[:, None] * n_groups
+        group_sums = np.bincount(
+            shuffled.ravel(), weights=weights[: batch * n_obs], minlength=batch * n_groups
+        ).reshape(batch, n_groups)
+        f_statistics[start:stop] = _f_statistics(group_sums, group_counts, total, ss_total)
+
+    return f_statistics
+
+
+def permutation_anova(
+    values,
+    groups,
+    num_permutations: int = 10000,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    rng: np.random.Generator = None,
+    workers: int = 1,
+) -> tuple:
+    """
+    Permutation F-test for equal means across k groups, e.g. the three Promotion arms.
+
+    A distribution-free fallback for one-way ANOVA when normality or equal
+    variances do not hold. Group labels are encoded once as integer codes and
+    permuted in vectorized batches.
+
+    Parameters:
+        values (array-like): The observations, e.g. SalesInThousands.
+        groups (array-like): Group label of every observation, e.g. Promotion.
+        num_permutations (int, optional): Number of permutations. Defaults to 10000.
+        max_memory_bytes (int, optional): Memory budget for a single batch of labels. Defaults to 256 MB.
+        rng (np.random.Generator, optional): Generator or seed for reproducible results. Defaults to None.
+        workers (int, optional): Number of worker processes, -1 for all cores. Defaults to 1.
+
+    Returns:
+        tuple: (observed F statistic, p-value, permuted F statistics as np.ndarray).
+    """
+
+    values = np.asarray(values, dtype=float)
+    codes, uniques = pd.factorize(np.asarray(groups))
+    if len(codes) != len(values):
+        raise ValueError("values and groups must have the same length.")
+    if (codes < 0).any():
+        raise ValueError("Group labels must not contain missing values.")
+    if len(uniques) < 2:
+        raise ValueError("At least two groups are needed.")
+    rng = np.random.default_rng(rng)
+
+    group_counts = np.bincount(codes)
+    total = values.sum()
+    ss_total = np.sum((values - total / len(values)) ** 2)
+    group_sums = np.bincount(codes, weights=values)
+    observed = _f_statistics(group_sums, group_counts, total, ss_total)
+
+    # Never start more workers than there are permutations, so no batch is empty.
+    workers = min(resolve_workers(workers), max(1, num_permutations))
+    if workers == 1:
+        permuted_f = _permuted_f_statistics(
+            values, codes, num_permutations, rng, max_memory_bytes
+        )
+    else:
+        tasks = [
+            (values, codes, batch, batch_rng, max_memory_bytes // workers)
+            for batch, batch_rng in zip(
+                split_count(num_permutations, workers), spawn_generators(rng, workers)
+            )
+        ]
+        permuted_f = np.concatenate(parallel_map(_permuted_f_statistics, tasks, workers))
+
+    return observed, _p_value(permuted_f, observed, "greater"), permuted_f
@@ -3,7 +3,6 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.preprocessing import MultiLabelBinarizer
-from scipy.stats import chi2_contingency
 from statsmodels.stats.proportion import proportion_confint
 from sklearn.preprocessing import OneHotEncoder
 import scipy.stats as stats
@@ -12,6 +11,8 @@ import folium
 import json
 from shapely.geometry import shape
 
+from src.parallel import parallel_map, resolve_workers
+
 
 def print_list(list_to_print: list) -> None:
     """
@@ -343,31 +344,37 @@ def encode_feature_from_list(df: pd.DataFrame, encode_feature: str) -> pd.DataFr
 
 
 def count_group_total_percentage(
-    df: pd.DataFrame, feature_1: str, feature_2: str
+    df: pd.DataFrame,
+    feature_1: str,
+    feature_2: str,
+    observed: bool = False,
+    count_col: str = None,
 ) -> pd.DataFrame:
     """
     Calculate the count, total, and percentage for grouped categories in a DataFrame.
 
+    Totals per ``feature_1`` group are broadcast onto the counts with a grouped
+    transform, so no second table is merged back.
+
     Parameters:
         df (pd.DataFrame): The input DataFrame.
         feature_1 (str): The primary grouping feature.
         feature_2 (str): The secondary grouping feature.
+        observed (bool, optional): Only return category combinations present in the data
+            instead of every combination of categorical features. Defaults to False.
+        count_col (str, optional): Column with pre-aggregated counts to sum instead of
+            counting rows. Defaults to None.
 
     Returns:
         pd.DataFrame: A DataFrame with counts, totals, and percentages.
     """
 
-    count_data = (
-        df.groupby([feature_1, feature_2], observed=False)
-        .size()
-        .reset_index(name="count")
-    )
-    count_data_with_totals = count_data.merge(
-        count_data.groupby(feature_1, observed=False)["count"]
-        .sum()
-        .reset_index(name="total"),
-        on=feature_1,
-        how="left",
+    grouped = df.groupby([feature_1, feature_2], observed=observed)
+    counts = grouped.size() if count_col is None else grouped[count_col].sum()
+
+    count_data_with_totals = counts.reset_index(name="count")
+    count_data_with_totals["total"] = (
+        counts.groupby(level=0, observed=observed).transform("sum").to_numpy()
     )
     count_data_with_totals["percentage"] = round(
         (count_data_with_totals["count"] / count_data_with_totals["total"]) * 100, 1
@@ -551,6 +558,64 @@ def create_us_map(state_dict: dict, state_dict_percentage: dict) -> folium.Map:
     return m
 
 
+def _factorize_categorical(values) -> tuple:
+    """
+    Encode a categorical variable as integer codes.
+
+    Parameters:
+        values (array-like): The categorical variable.
+
+    Returns:
+        tuple: (codes as np.ndarray with -1 for missing values, number of categories).
+    """
+
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        # Categoricals are already encoded; unused categories drop out of the table later.
+        return np.asarray(values.cat.codes, dtype=np.int64), len(values.cat.categories)
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64), len(uniques)
+
+
+def _cramers_v_from_codes(
+    codes_x: np.ndarray, n_x: int, codes_y: np.ndarray, n_y: int
+) -> float:
+    """
+    Calculate Cramér's V from integer codes of two categorical variables.
+
+    The contingency table is built with a single ``np.bincount`` and the
+    chi-square statistic is computed in closed form, matching
+    ``chi2_contingency`` including Yates' correction for 2x2 tables.
+
+    Parameters:
+        codes_x (np.ndarray): Codes of the first variable, -1 for missing values.
+        n_x (int): Number of categories of the first variable.
+        codes_y (np.ndarray): Codes of the second variable, -1 for missing values.
+        n_y (int): Number of categories of the second variable.
+
+    Returns:
+        float: The Cramér's V statistic, NaN if either variable has a single category.
+    """
+
+    cells = np.asarray(codes_x, dtype=np.int64) * n_y + codes_y
+    if codes_x.min(initial=0) < 0 or codes_y.min(initial=0) < 0:
+        cells = cells[(codes_x >= 0) & (codes_y >= 0)]
+    table = np.bincount(cells, minlength=n_x * n_y).reshape(n_x, n_y)
+    # Like pd.crosstab, keep only categories observed in complete pairs.
+    table = table[table.any(axis=1)][:, table.any(axis=0)]
+
+    r, k = table.shape
+    if min(r, k) < 2:
+        return np.nan
+
+    n = table.sum()
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    deviation = np.abs(table - expected)
+    if (r - 1) * (k - 1) == 1:
+        deviation = deviation - np.minimum(0.5, deviation)
+    chi2 = np.sum(deviation**2 / expected)
+    return np.sqrt(chi2 / (n * (min(r, k) - 1)))
+
+
 def cramers_v(x: pd.Series, y: pd.Series) -> float:
     """
     Calculate Cramér's V statistic for categorical-categorical association.
@@ -563,19 +628,42 @@ def cramers_v(x: pd.Series, y: pd.Series) -> float:
         float: The Cramér's V statistic.
     """
 
-    contingency_table = pd.crosstab(x, y)
-    chi2 = chi2_contingency(contingency_table)[0]
-    n = contingency_table.sum().sum()
-    r, k = contingency_table.shape
-    return np.sqrt(chi2 / (n * (min(r, k) - 1)))
+    return _cramers_v_from_codes(*_factorize_categorical(x), *_factorize_categorical(y))
 
 
-def categorical_correlation_matrix(df: pd.DataFrame) -> pd.DataFrame:
+def _cramers_v_pairs(codes: tuple, n_categories: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """
+    Calculate Cramér's V for a batch of column pairs.
+
+    Parameters:
+        codes (tuple): Integer code array of every column of the original frame.
+        n_categories (np.ndarray): Number of categories of every column.
+        pairs (np.ndarray): Row positions (i, j) of the pairs, one pair per row.
+
+    Returns:
+        np.ndarray: Cramér's V of every pair.
+    """
+
+    return np.array(
+        [
+            _cramers_v_from_codes(codes[i], n_categories[i], codes[j], n_categories[j])
+            for i, j in pairs
+        ]
+    )
+
+
+def categorical_correlation_matrix(df: pd.DataFrame, workers: int = 1) -> pd.DataFrame:
     """
     Compute a correlation matrix for categorical features.
 
+    Every categorical column is factorized once and Cramér's V is computed
+    only for the upper triangle, which is mirrored into the lower one. With
+    ``workers > 1`` batches of pairs run in a process pool that reads the
+    codes from shared memory.
+
     Parameters:
         df (pd.DataFrame): The input DataFrame.
+        workers (int, optional): Number of worker processes, -1 for all cores. Defaults to 1.
 
     Returns:
         pd.DataFrame: A DataFrame with correlation values.
@@ -583,18 +671,36 @@ def categorical_correlation_matrix(df: pd.DataFrame) -> pd.DataFrame:
 
     categorical_columns = df.select_dtypes(include=["object", "category"]).columns
     n = len(categorical_columns)
-    corr_matrix = pd.DataFrame(
-        np.zeros((n, n)), index=categorical_columns, columns=categorical_columns
+
+    # Codes are kept per column in the narrowest integer type that holds the
+    # column's category count, usually int8 or int16.
+    codes = []
+    n_categories = np.empty(n, dtype=np.int64)
+    for i, col in enumerate(categorical_columns):
+        col_codes, n_categories[i] = _factorize_categorical(df[col])
+        code_dtype = next(
+            dtype
+            for dtype in (np.int8, np.int16, np.int32, np.int64)
+            if np.iinfo(dtype).max >= n_categories[i]
+        )
+        codes.append(col_codes.astype(code_dtype))
+    codes = tuple(codes)
+
+    rows, cols = np.triu_indices(n, k=1)
+    pairs = np.column_stack([rows, cols])
+    # Several batches per worker keep the pool busy when pair costs differ.
+    workers = resolve_workers(workers)
+    batches = np.array_split(pairs, max(1, min(len(pairs), 4 * workers)))
+    values = parallel_map(
+        _cramers_v_pairs, [(codes, n_categories, batch) for batch in batches], workers
     )
 
-    for i, col1 in enumerate(categorical_columns):
-        for j, col2 in enumerate(categorical_columns):
-            if i != j:
-                corr_matrix.iloc[i, j] = cramers_v(df[col1], df[col2])
-            else:
-                corr_matrix.iloc[i, j] = 1
+    corr_matrix = np.eye(n)
+    if len(pairs):
+        corr_matrix[rows, cols] = np.concatenate(values)
+        corr_matrix[cols, rows] = corr_matrix[rows, cols]
 
-    return corr_matrix
+    return pd.DataFrame(corr_matrix, index=categorical_columns, columns=categorical_columns)
 
 
 def plot_heatmap(
@@ -644,32 +750,95 @@ def plot_heatmap(
 
 
 
+def _anova_p_values(codes: np.ndarray, n_groups: int, values: np.ndarray) -> np.ndarray:
+    """
+    One-way ANOVA p-values of several numeric features against one grouping.
+
+    Per-group counts, sums and sums of squares for every feature come from a
+    single ``np.bincount`` over (group, feature) cells. Values are centred on
+    their column means first to keep the sums of squares accurate. Rows with
+    a missing group and missing numeric values are ignored.
+
+    Parameters:
+        codes (np.ndarray): Integer group code of every row, -1 for missing.
+        n_groups (int): Number of groups.
+        values (np.ndarray): Numeric values, one column per feature.
+
+    Returns:
+        np.ndarray: The p-value for every feature, NaN with fewer than two groups.
+    """
+
+    n_features = values.shape[1]
+    values = values[codes >= 0]
+    codes = codes[codes >= 0]
+
+    present = ~np.isnan(values)
+    centred = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+    cells = (codes[:, None] * n_features + np.arange(n_features)).ravel()
+    size = n_groups * n_features
+
+    def group_totals(weights):
+        return np.bincount(cells, weights=weights.ravel(), minlength=size).reshape(
+            n_groups, n_features
+        )
+
+    counts = group_totals(present.astype(float))
+    sums = group_totals(centred)
+    sums_of_squares = group_totals(centred**2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n_obs = counts.sum(axis=0)
+        groups = np.count_nonzero(counts, axis=0)
+        total = sums.sum(axis=0)
+        ss_total = sums_of_squares.sum(axis=0) - total**2 / n_obs
+        group_ss = np.divide(sums**2, counts, out=np.zeros(counts.shape), where=counts > 0)
+        ss_between = group_ss.sum(axis=0) - total**2 / n_obs
+        ss_within = ss_total - ss_between
+        f_stat = (ss_between / (groups - 1)) / (ss_within / (n_obs - groups))
+        p_values = stats.f.sf(f_stat, groups - 1, n_obs - groups)
+
+    return np.where(groups >= 2, p_values, np.nan)
+
+
 def categorical_and_numeric_correlation(
-    df: pd.DataFrame, numeric_feature: str, categorical_columns: list
+    df: pd.DataFrame, numeric_feature, categorical_columns: list
 ) -> pd.DataFrame:
     """
     Compute ANOVA p-values for numeric-categorical feature pairs.
 
+    Each categorical column is factorized once and the F statistics of all
+    numeric features are computed from per-group counts, sums and sums of
+    squares, without splitting the frame into groups.
+
     Parameters:
         df (pd.DataFrame): The input DataFrame.
-        numeric_feature (str): The numeric feature.
+        numeric_feature (str or list): The numeric feature, or a list of numeric features.
         categorical_columns (list): List of categorical features.
 
     Returns:
-        pd.DataFrame: A DataFrame with p-values for each categorical feature.
+        pd.DataFrame: A DataFrame with p-values for each categorical feature, in a 'p_value'
+            column for a single numeric feature or one column per numeric feature for a list.
     """
 
-    p_values = {}
-    for col in categorical_columns:
-        groups = [
-            df[df[col] == category][numeric_feature] for category in df[col].unique()
+    if isinstance(numeric_feature, str):
+        numeric_features = [numeric_feature]
+    else:
+        numeric_features = list(numeric_feature)
+    values = df[numeric_features].to_numpy(dtype=float)
+
+    p_values = np.array(
+        [
+            _anova_p_values(*_factorize_categorical(df[col]), values)
+            for col in categorical_columns
         ]
-        f_stat, p_value = stats.f_oneway(*groups)
-        p_values[col] = p_value
+    ).reshape(len(categorical_columns), len(numeric_features))
 
-    p_values_df = pd.DataFrame(list(p_values.items()), columns=["Feature", "p_value"])
+    columns = ["p_value"] if isinstance(numeric_feature, str) else numeric_features
+    p_values_df = pd.DataFrame(
+        p_values, index=pd.Index(categorical_columns, name="Feature"), columns=columns
+    )
 
-    return p_values_df.set_index("Feature")
+    return p_values_df
 
 
 def encode_categorical_features(
@@ -701,42 +870,70 @@ def encode_categorical_features(
     return df_joined
 
 
-def count_prevalence_rate(df: pd.DataFrame, conditions: list) -> pd.DataFrame:
+def count_prevalence_rate(
+    df: pd.DataFrame, conditions: list, group_col: str = None
+) -> pd.DataFrame:
     """
     Calculate prevalence rates and confidence intervals for conditions.
 
+    Counts for all conditions come from one column-sum reduction and the
+    Wilson bounds are computed for every condition (and group) at once.
+
     Parameters:
         df (pd.DataFrame): The input DataFrame.
         conditions (list): List of conditions to analyze.
+        group_col (str, optional): Column to segment by; rates and intervals are then
+            computed within every group. Defaults to None.
 
     Returns:
-        pd.DataFrame: A DataFrame with prevalence rates and confidence intervals.
-    """
-
-    prevalence_rates = []
-    lower_bounds = []
-    upper_bounds = []
-    for condition in conditions:
-        prevalence = df[condition].mean()
-
-        positive_count = df[condition].sum()
-        all_count = len(df)
-        lower, upper = proportion_confint(
-            positive_count, all_count, alpha=0.05, method="wilson"
-        )
-
-        prevalence_rates.append(prevalence)
-        lower_bounds.append(lower)
-        upper_bounds.append(upper)
+        pd.DataFrame: A DataFrame with prevalence rates and confidence intervals,
+            with a leading ``group_col`` column when grouping.
+    """
+
+    conditions = list(conditions)
+    # Only columns whose dtype can hold missing values need a non-null count.
+    dtypes = df.dtypes[conditions]
+    nullable_positions = [
+        i
+        for i, dtype in enumerate(dtypes)
+        if not (isinstance(dtype, np.dtype) and dtype.kind in "biu")
+    ]
+    nullable = [conditions[i] for i in nullable_positions]
+
+    if group_col is None:
+        positive_counts = df[conditions].sum().to_numpy()[None, :]
+        all_counts = np.array([[len(df)]])
+        non_null_counts = np.repeat(all_counts, len(conditions), axis=1)
+        if nullable:
+            non_null_counts[:, nullable_positions] = df[nullable].count().to_numpy()
+    else:
+        grouped = df.groupby(group_col, observed=True)
+        positive_counts = grouped[conditions].sum()
+        groups = positive_counts.index
+        positive_counts = positive_counts.to_numpy()
+        all_counts = grouped.size().to_numpy()[:, None]
+        non_null_counts = np.repeat(all_counts, len(conditions), axis=1)
+        if nullable:
+            non_null_counts[:, nullable_positions] = grouped[nullable].count().to_numpy()
+
+    positive_counts = positive_counts.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prevalence_rates = positive_counts / non_null_counts
+    lower_bounds, upper_bounds = proportion_confint(
+        positive_counts, np.broadcast_to(all_counts, positive_counts.shape),
+        alpha=0.05, method="wilson"
+    )
 
     prevalence_df = pd.DataFrame(
         {
-            "Condition": conditions,
-            "Prevalence Rate": prevalence_rates,
-            "Lower Bound": lower_bounds,
-            "Upper Bound": upper_bounds,
+            "Condition": np.tile(conditions, positive_counts.shape[0]),
+            "Prevalence Rate": prevalence_rates.ravel(),
+            "Lower Bound": lower_bounds.ravel(),
+            "Upper Bound": upper_bounds.ravel(),
         }
     )
+    if group_col is not None:
+        prevalence_df.insert(0, group_col, np.repeat(groups.to_numpy(), len(conditions)))
 
     return prevalence_df
 